@@ -1,20 +1,15 @@
+import os
+import zipfile
+from pathlib import Path
+
 import numpy as np
 from pyldpc import make_ldpc, encode, decode, get_message
 
-# Parameters
-n = 15
-k = 9
-d_v = 3
-d_c = 5
-seed = 123
-snr = 20
-
-np.random.seed(seed)
-H, G = make_ldpc(n, d_v, d_c, systematic=True, sparse=False, seed=seed)
-k = G.shape[1]
+# Anchored to this file so callers and pool workers started from any working
+# directory share one cache.
+CACHE_DIR = Path(os.environ.get("LDPC_CACHE_DIR",
+                                Path(__file__).resolve().parent / "results" / "ldpc_cache"))
 
-print("H matrix shape:", H.shape)
-print("G matrix shape:", G.shape)
 
 def syndrome_table(H):
     m, n = H.shape
@@ -29,17 +24,110 @@ def syndrome_table(H):
             syndrome_tbl[syndrome_tuple] = e
     return syndrome_tbl
 
-syndrome_tbl = syndrome_table(H)
-
 def code_distance(syndrome_tbl):
     distances = [np.sum(e) for e in syndrome_tbl.values()]
     return min(distances)
 
-code_dist = code_distance(syndrome_tbl)
+
+class LDPCCode:
+    # H, G, syndrome table and distance are built on first access and
+    # persisted to an .npz file keyed by the construction parameters.
+    def __init__(self, n=15, d_v=3, d_c=5, seed=123, systematic=True, cache_dir=CACHE_DIR):
+        self.n = n
+        self.d_v = d_v
+        self.d_c = d_c
+        self.seed = seed
+        self.systematic = systematic
+        self.cache_dir = Path(cache_dir).resolve() if cache_dir is not None else None
+        self._data = {}
+        self._views = {}
+        self._loaded = False
+
+    @property
+    def cache_path(self):
+        # An unseeded code is different on every build, so it is never cached.
+        if self.cache_dir is None or self.seed is None:
+            return None
+        name = "ldpc_n{}_dv{}_dc{}_s{}_{}.npz".format(
+            self.n, self.d_v, self.d_c, self.seed, "sys" if self.systematic else "nsys")
+        return self.cache_dir / name
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        path = self.cache_path
+        if path is None or not path.exists():
+            return
+        try:
+            with np.load(path) as cached:
+                self._data = {name: cached[name] for name in cached.files}
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+            self._data = {}
+
+    def _save(self):
+        path = self.cache_path
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so concurrent pool workers never
+        # observe a half-written cache.
+        tmp_path = path.with_name("{}.{}.tmp.npz".format(path.stem, os.getpid()))
+        np.savez_compressed(tmp_path, **self._data)
+        os.replace(tmp_path, path)
+
+    def _build_matrices(self):
+        H, G = make_ldpc(self.n, self.d_v, self.d_c, systematic=self.systematic,
+                         sparse=False, seed=self.seed)
+        self._data["H"] = np.asarray(H, dtype=np.uint8)
+        self._data["G"] = np.asarray(G, dtype=np.uint8)
+        self._save()
+
+    def _build_syndromes(self):
+        tbl = syndrome_table(self.H)
+        self._data["syndromes"] = np.array(list(tbl.keys()), dtype=np.uint8)
+        self._data["errors"] = np.array(list(tbl.values()), dtype=np.uint8)
+        self._data["distance"] = np.array(code_distance(tbl))
+        self._save()
+
+    def _view(self, name, required, build, convert):
+        # Decoded values are built once per instance and shared by later calls.
+        if name not in self._views:
+            self._load()
+            if required not in self._data:
+                build()
+            self._views[name] = convert()
+        return self._views[name]
+
+    @property
+    def H(self):
+        return self._view("H", "H", self._build_matrices,
+                          lambda: self._data["H"].astype(int))
+
+    @property
+    def G(self):
+        return self._view("G", "G", self._build_matrices,
+                          lambda: self._data["G"].astype(int))
+
+    @property
+    def k(self):
+        return self.G.shape[1]
+
+    @property
+    def syndrome_tbl(self):
+        return self._view("syndrome_tbl", "syndromes", self._build_syndromes,
+                          lambda: {tuple(int(b) for b in s): e.astype(int)
+                                   for s, e in zip(self._data["syndromes"], self._data["errors"])})
+
+    @property
+    def distance(self):
+        return self._view("distance", "distance", self._build_syndromes,
+                          lambda: int(self._data["distance"]))
+
 
 def gallager_b_algorithm(H, y, max_iter=50, th0=0.5, th1=0.5):
     m, n = H.shape
-    
+
     LLR = np.random.rand(n) * 2 - 1
     LLR = np.concatenate([LLR, np.zeros(m)])
 
@@ -48,26 +136,17 @@ def gallager_b_algorithm(H, y, max_iter=50, th0=0.5, th1=0.5):
             check_nodes = np.nonzero(H[j])[0]
             for i in check_nodes:
                 LLR[j + n] += LLR[i]
-        
+
         for i in range(n):
             variable_nodes = np.nonzero(H[:, i])[0]
             for j in variable_nodes:
                 LLR[i] += LLR[j + n]
-        
+
         decoded = (LLR[:n] > 0).astype(int)
         if np.all((H @ decoded) % 2 == 0):
             return decoded
-        
-    return decoded
-
-# Encoding and Decoding Example
-v = np.random.randint(2, size=k)
-y = encode(G, v, snr)
-decoded = decode(H, y, snr)
-x = get_message(G, decoded)
 
-# Check if encoding and decoding are successful
-print(abs(x - v).sum() == 0)
+    return decoded
 
 def find_min_error_vector(H, syndrome_table, th0, th1):
     min_error_vector = None
@@ -85,11 +164,39 @@ def print_syndrome_table(syndrome_tbl):
         error_vector_str = ''.join(map(str, error_vector))
         print(f"Syndrome: {syndrome_str} -> Error Vector: {error_vector_str}")
 
-error_vector = find_min_error_vector(H, syndrome_tbl, th0=0.5, th1=0.5)
+if __name__ == "__main__":
+    # Parameters
+    n = 15
+    d_v = 3
+    d_c = 5
+    seed = 123
+    snr = 20
+
+    np.random.seed(seed)
+    code = LDPCCode(n, d_v, d_c, seed=seed, systematic=True)
+    H, G = code.H, code.G
+    k = code.k
+
+    print("H matrix shape:", H.shape)
+    print("G matrix shape:", G.shape)
+
+    syndrome_tbl = code.syndrome_tbl
+    code_dist = code.distance
+
+    # Encoding and Decoding Example
+    v = np.random.randint(2, size=k)
+    y = encode(G, v, snr)
+    decoded = decode(H, y, snr)
+    x = get_message(G, decoded)
+
+    # Check if encoding and decoding are successful
+    print(abs(x - v).sum() == 0)
+
+    error_vector = find_min_error_vector(H, syndrome_tbl, th0=0.5, th1=0.5)
 
-print("LDPC Matrix H:\n", H)
-print_syndrome_table(syndrome_tbl)
-print("Code Distance:", code_dist)
-print("Vector: ", v)
-print("Decoded Vector:\n", x)
-print("Error Vector:\n", error_vector)
+    print("LDPC Matrix H:\n", H)
+    print_syndrome_table(syndrome_tbl)
+    print("Code Distance:", code_dist)
+    print("Vector: ", v)
+    print("Decoded Vector:\n", x)
+    print("Error Vector:\n", error_vector)
@@ -0,0 +1,247 @@
+import os
+import struct
+import sys
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from ldpc_raw import (generate_qc_base, qc_to_tanner, generator_matrix,
+                      encode_batch, bit_flip_decode_batch)
+
+# Protected file layout: fixed header, then one packed codeword per block.
+# The code is rebuilt from the QC parameters and seed stored in the header.
+# The header travels over the same noisy link, so it is stored HEADER_COPIES
+# times with a CRC32 and recovered by a bitwise majority vote.
+MAGIC = b"LDPC"
+VERSION = 2
+HEADER = struct.Struct(">4sBHHHHIIIQ")
+HEADER_RECORD = struct.Struct(">{}sI".format(HEADER.size))
+HEADER_COPIES = 5
+HEADER_SIZE = HEADER_RECORD.size * HEADER_COPIES
+MAX_CODE_LENGTH = 8192
+
+DEFAULT_PARAMS = {"n_blocks": 24, "m_blocks": 12, "Z": 64, "wc": 3, "seed": 12345}
+BATCH_BLOCKS = 256
+UINT16_FIELDS = ("n_blocks", "m_blocks", "Z", "wc")
+
+
+class FileCode:
+    def __init__(self, n_blocks, m_blocks, Z, wc, seed):
+        self.params = {"n_blocks": n_blocks, "m_blocks": m_blocks, "Z": Z, "wc": wc, "seed": seed}
+        self.graph = qc_to_tanner(generate_qc_base(n_blocks, m_blocks, Z, wc, seed=seed), Z)
+        self.Gp, self.info = generator_matrix(self.graph)
+        self.n = self.graph.n
+        self.k = self.Gp.shape[0]
+        self.block_bytes = (self.n + 7) // 8
+
+
+def check_params(params):
+    # A protected file must be reproducible from its header, so the seed is
+    # required and every field has to fit its header slot.
+    if params.get("seed") is None:
+        raise ValueError("A fixed seed is required to protect a file")
+    for name in UINT16_FIELDS:
+        if not isinstance(params[name], (int, np.integer)) or not 0 < params[name] < 1 << 16:
+            raise ValueError("Code parameter {} out of range: {!r}".format(name, params[name]))
+    if not isinstance(params["seed"], (int, np.integer)) or not 0 <= params["seed"] < 1 << 32:
+        raise ValueError("Code parameter seed out of range: {!r}".format(params["seed"]))
+    n_blocks, m_blocks, Z, wc = (params[name] for name in UINT16_FIELDS)
+    if not (m_blocks < n_blocks and wc <= m_blocks and n_blocks * Z <= MAX_CODE_LENGTH):
+        raise ValueError("Invalid code parameters: {}".format(params))
+
+
+@contextmanager
+def _replace_on_success(filename):
+    # Write next to the target and swap it in only once everything succeeded,
+    # so a rejected input never truncates an existing output.
+    path = Path(filename)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name("{}.{}.tmp".format(path.name, os.getpid()))
+    try:
+        with open(tmp_path, 'wb') as file:
+            yield file
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _read_bit_blocks(file, k, batch_blocks):
+    # Yields (batch, k) message blocks; the last block is zero padded.
+    carry = np.zeros(0, dtype=np.uint8)
+    chunk_bytes = (k * batch_blocks + 7) // 8
+    while True:
+        chunk = file.read(chunk_bytes)
+        if chunk:
+            bits = np.concatenate([carry, np.unpackbits(np.frombuffer(chunk, dtype=np.uint8))])
+        else:
+            if carry.size == 0:
+                return
+            bits = np.concatenate([carry, np.zeros(k - carry.size, dtype=np.uint8)])
+        full = bits.size // k
+        carry = bits[full * k:]
+        if full:
+            yield bits[:full * k].reshape(full, k)
+
+
+def protect_file(input_filename, output_filename, params=None, batch_blocks=BATCH_BLOCKS):
+    params = params or DEFAULT_PARAMS
+    check_params(params)
+    code = FileCode(**params)
+    file_size = os.path.getsize(input_filename)
+    n_codewords = -(-file_size * 8 // code.k)
+
+    with open(input_filename, 'rb') as src, _replace_on_success(output_filename) as dst:
+        p = code.params
+        header = HEADER.pack(MAGIC, VERSION, p["n_blocks"], p["m_blocks"], p["Z"], p["wc"],
+                             p["seed"], code.k, code.n, file_size)
+        dst.write(HEADER_RECORD.pack(header, zlib.crc32(header)) * HEADER_COPIES)
+        for messages in _read_bit_blocks(src, code.k, batch_blocks):
+            codewords = encode_batch(code.Gp, messages, code.n)
+            dst.write(np.packbits(codewords, axis=1).tobytes())
+
+    return n_codewords
+
+
+def _unpack_header_record(record):
+    header, crc = HEADER_RECORD.unpack(record)
+    return header if zlib.crc32(header) == crc else None
+
+def read_header(file):
+    data = file.read(HEADER_SIZE)
+    if len(data) < HEADER_SIZE:
+        raise ValueError("Not an LDPC protected file")
+
+    copies = np.frombuffer(data, dtype=np.uint8).reshape(HEADER_COPIES, HEADER_RECORD.size)
+    votes = np.unpackbits(copies, axis=1).sum(axis=0)
+    majority = np.packbits(2 * votes > HEADER_COPIES).tobytes()
+    header = _unpack_header_record(majority)
+    for record in copies:
+        if header is not None:
+            break
+        header = _unpack_header_record(record.tobytes())
+    if header is None:
+        raise ValueError("LDPC header is corrupted")
+
+    magic, version, n_blocks, m_blocks, Z, wc, seed, k, n, file_size = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not an LDPC protected file")
+    params = {"n_blocks": n_blocks, "m_blocks": m_blocks, "Z": Z, "wc": wc, "seed": seed}
+    # Reject impossible parameters before any code is built from them.
+    try:
+        check_params(params)
+    except ValueError:
+        raise ValueError("LDPC header has invalid code parameters")
+    if not (n == n_blocks * Z and 0 < k < n):
+        raise ValueError("LDPC header has invalid code parameters")
+    return params, k, n, file_size
+
+
+def recover_file(input_filename, output_filename, batch_blocks=BATCH_BLOCKS, max_iter=50):
+    stats = {"blocks": 0, "clean": 0, "corrected": 0, "failed": 0, "bits_flipped": 0}
+
+    with open(input_filename, 'rb') as src:
+        params, k, n, file_size = read_header(src)
+        n_codewords = -(-file_size * 8 // k)
+        expected_size = HEADER_SIZE + n_codewords * ((n + 7) // 8)
+        actual_size = os.fstat(src.fileno()).st_size
+        if actual_size < expected_size:
+            raise ValueError("Protected file is truncated")
+        if actual_size > expected_size:
+            raise ValueError("Protected file size does not match its header")
+        code = FileCode(**params)
+        if (code.k, code.n) != (k, n):
+            raise ValueError("Header does not match the rebuilt code")
+
+        with _replace_on_success(output_filename) as dst:
+            remaining_bytes = file_size
+            pending = np.zeros(0, dtype=np.uint8)
+            while remaining_bytes > 0:
+                chunk = src.read(code.block_bytes * batch_blocks)
+                if not chunk or len(chunk) % code.block_bytes:
+                    raise ValueError("Protected file is truncated")
+                packed = np.frombuffer(chunk, dtype=np.uint8).reshape(-1, code.block_bytes)
+                received = np.unpackbits(packed, axis=1)[:, :code.n]
+                decoded, success = bit_flip_decode_batch(code.graph, received, max_iter)
+
+                flipped = np.count_nonzero(decoded != received, axis=1)
+                stats["blocks"] += len(decoded)
+                stats["clean"] += int(np.sum(success & (flipped == 0)))
+                stats["corrected"] += int(np.sum(success & (flipped > 0)))
+                stats["failed"] += int(np.sum(~success))
+                stats["bits_flipped"] += int(flipped.sum())
+
+                bits = np.concatenate([pending, decoded[:, code.info].ravel()])
+                whole = bits.size // 8 * 8
+                data = np.packbits(bits[:whole]).tobytes()[:remaining_bytes]
+                pending = bits[whole:]
+                dst.write(data)
+                remaining_bytes -= len(data)
+
+    return stats
+
+
+def add_channel_noise(filename, bit_error_rate, seed=None, chunk_bytes=1 << 20):
+    # Binary symmetric channel over the whole protected file, header included.
+    rng = np.random.RandomState(seed)
+    with open(filename, 'r+b') as file:
+        offset = 0
+        while True:
+            file.seek(offset)
+            chunk = file.read(chunk_bytes)
+            if not chunk:
+                break
+            bits = np.unpackbits(np.frombuffer(chunk, dtype=np.uint8))
+            bits ^= (rng.rand(bits.size) < bit_error_rate).astype(np.uint8)
+            file.seek(offset)
+            file.write(np.packbits(bits).tobytes())
+            offset += len(chunk)
+
+
+def throughput(size_bytes, seconds):
+    # Decimal megabytes per second, matching the "MB/s" printed below.
+    return size_bytes / 1e6 / seconds if seconds > 0 else float('inf')
+
+
+def files_equal(filename_a, filename_b, chunk_bytes=1 << 20):
+    if os.path.getsize(filename_a) != os.path.getsize(filename_b):
+        return False
+    with open(filename_a, 'rb') as a, open(filename_b, 'rb') as b:
+        while True:
+            chunk_a, chunk_b = a.read(chunk_bytes), b.read(chunk_bytes)
+            if chunk_a != chunk_b:
+                return False
+            if not chunk_a:
+                return True
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("File not provided! Closing..")
+        sys.exit(1)
+
+    bit_error_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.005
+
+    for input_filename in sys.argv[1:2]:
+        name = Path(input_filename).name
+        protected_filename = f"results/ldpc/{name}.ldpc"
+        decoded_filename = f"results/ldpc/decoded/{name}"
+        original_size = os.path.getsize(input_filename)
+
+        start = time.perf_counter()
+        blocks = protect_file(input_filename, protected_filename)
+        encode_time = time.perf_counter() - start
+        print(f"Protected {blocks} blocks: {throughput(original_size, encode_time):.2f} MB/s")
+
+        add_channel_noise(protected_filename, bit_error_rate)
+
+        start = time.perf_counter()
+        stats = recover_file(protected_filename, decoded_filename)
+        decode_time = time.perf_counter() - start
+        print(f"Decoded {stats['blocks']} blocks: {throughput(original_size, decode_time):.2f} MB/s")
+        print(f"Clean: {stats['clean']}, corrected: {stats['corrected']}, "
+              f"failed: {stats['failed']}, bits flipped: {stats['bits_flipped']}")
+
+        print("Decoded file matches original:", files_equal(input_filename, decoded_filename))
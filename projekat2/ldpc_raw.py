@@ -1,5 +1,6 @@
 import numpy as np
 import random
+from collections import namedtuple
 from itertools import combinations
 
 def generate_H_matrix(n=15, n_minus_k=9, wr=5, wc=3, seed=None):
@@ -15,6 +16,291 @@ def generate_H_matrix(n=15, n_minus_k=9, wr=5, wc=3, seed=None):
 
     return H
 
+# GF(2) kernel on bit-packed rows: bit j of a row lives in word j // 64 at
+# position j % 64, so a row of length n takes ceil(n / 64) uint64 words.
+WORD_BITS = 64
+
+if hasattr(np, "bitwise_count"):
+    def _popcount(words):
+        return np.bitwise_count(words).astype(np.int64)
+else:
+    _BYTE_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+    def _popcount(words):
+        words = np.ascontiguousarray(words, dtype=np.uint64)
+        counts = _BYTE_POPCOUNT[words.view(np.uint8)]
+        return counts.reshape(words.shape + (8,)).sum(axis=-1)
+
+def n_words(n):
+    return (n + WORD_BITS - 1) // WORD_BITS
+
+def pack_bits(M):
+    M = np.atleast_2d(np.asarray(M, dtype=np.uint8) & 1)
+    rows, n = M.shape
+    padded = np.zeros((rows, n_words(n) * WORD_BITS), dtype=np.uint8)
+    padded[:, :n] = M
+    packed = np.packbits(padded, axis=1, bitorder="little")
+    return packed.view("<u8").astype(np.uint64)
+
+def unpack_bits(P, n):
+    P = np.atleast_2d(np.ascontiguousarray(P, dtype="<u8"))
+    bits = np.unpackbits(P.view(np.uint8), axis=1, bitorder="little")
+    return bits[:, :n].astype(np.uint8)
+
+def gf2_weights(P):
+    return _popcount(np.atleast_2d(P)).sum(axis=1)
+
+def gf2_matvec(Hp, Xp):
+    # Parity of (row of H) AND x for every row of H and every packed vector x.
+    # Xp may be a single packed vector (words,) or a batch (batch, words).
+    single = np.ndim(Xp) == 1
+    Xp = np.atleast_2d(Xp)
+    and_words = Xp[:, None, :] & Hp[None, :, :]
+    parity = (_popcount(and_words).sum(axis=2) & 1).astype(np.uint8)
+    return parity[0] if single else parity
+
+def gf2_matmul(Ap, Bp):
+    # (A @ B) mod 2 with both operands packed by rows: row i of the product is
+    # the XOR of the rows of B selected by the set bits of row i of A.
+    A = unpack_bits(Ap, Bp.shape[0])
+    C = np.zeros((A.shape[0], Bp.shape[1]), dtype=np.uint64)
+    for j in range(Bp.shape[0]):
+        C ^= A[:, j:j + 1].astype(np.uint64) * Bp[j]
+    return C
+
+def _as_packed(H):
+    if isinstance(H, TannerGraph):
+        return tanner_to_packed(H), H.m, H.n
+    m, n = np.atleast_2d(H).shape
+    return pack_bits(H), m, n
+
+def gf2_systematic(H):
+    # Gauss-Jordan elimination over GF(2). Returns the reduced H, its pivot
+    # columns and the remaining (information) columns.
+    Hp, m, n = _as_packed(H)
+    Hp = Hp.copy()
+    pivots = []
+    row = 0
+    for col in range(n):
+        if row == m:
+            break
+        word, mask = col // WORD_BITS, np.uint64(1) << np.uint64(col % WORD_BITS)
+        candidates = np.nonzero(Hp[row:, word] & mask)[0]
+        if candidates.size == 0:
+            continue
+        pivot = row + candidates[0]
+        if pivot != row:
+            Hp[[row, pivot]] = Hp[[pivot, row]]
+        others = np.nonzero(Hp[:, word] & mask)[0]
+        others = others[others != row]
+        Hp[others] ^= Hp[row]
+        pivots.append(col)
+        row += 1
+    pivots = np.array(pivots, dtype=int)
+    info = np.setdiff1d(np.arange(n), pivots)
+    return Hp[:row], pivots, info
+
+def generator_matrix(H):
+    # Message bits are copied to the information columns; every parity bit
+    # equals the reduced H row of its pivot restricted to those columns.
+    Rp, pivots, info = gf2_systematic(H)
+    n = H.n if isinstance(H, TannerGraph) else np.atleast_2d(H).shape[1]
+    R = unpack_bits(Rp, n)
+    k = info.size
+    G = np.zeros((k, n), dtype=np.uint8)
+    G[np.arange(k), info] = 1
+    G[:, pivots] = R[:, info].T
+    return pack_bits(G), info
+
+def encode_batch(Gp, messages, n):
+    messages = np.atleast_2d(messages)
+    return unpack_bits(gf2_matmul(pack_bits(messages), Gp), n)
+
+def syndrome_batch(Hp, codewords):
+    return gf2_matvec(Hp, pack_bits(codewords))
+
+# Sparse parity-check matrices are kept as Tanner graph edge lists: edge e
+# joins check rows[e] with variable cols[e]. Memory is linear in the number
+# of edges, and the packed kernel and decoders below accept it directly.
+TannerGraph = namedtuple("TannerGraph", ["rows", "cols", "m", "n"])
+
+def tanner_from_H(H):
+    rows, cols = np.nonzero(H)
+    m, n = H.shape
+    return TannerGraph(rows.astype(np.int64), cols.astype(np.int64), m, n)
+
+def tanner_to_H(graph):
+    H = np.zeros((graph.m, graph.n), dtype=int)
+    np.bitwise_xor.at(H, (graph.rows, graph.cols), 1)
+    return H
+
+def tanner_to_packed(graph):
+    Hp = np.zeros((graph.m, n_words(graph.n)), dtype=np.uint64)
+    masks = np.uint64(1) << (graph.cols % WORD_BITS).astype(np.uint64)
+    np.bitwise_xor.at(Hp, (graph.rows, graph.cols // WORD_BITS), masks)
+    return Hp
+
+def generate_peg_graph(n=15, n_minus_k=9, wc=3, seed=None):
+    # Progressive Edge-Growth: each new edge of a variable node goes to the
+    # lowest-degree check that is farthest from it in the current graph, which
+    # greedily maximises the local girth.
+    rng = np.random.RandomState(seed)
+    m = n_minus_k
+    var_adj = [[] for _ in range(n)]
+    chk_adj = [[] for _ in range(m)]
+    chk_deg = np.zeros(m, dtype=int)
+
+    for j in range(n):
+        for t in range(min(wc, m)):
+            if t == 0:
+                candidates = np.arange(m)
+            else:
+                candidates = _peg_farthest_checks(j, var_adj, chk_adj, m)
+            degrees = chk_deg[candidates]
+            lowest = candidates[degrees == degrees.min()]
+            c = int(lowest[rng.randint(lowest.size)])
+            var_adj[j].append(c)
+            chk_adj[c].append(j)
+            chk_deg[c] += 1
+
+    rows = np.array([c for j in range(n) for c in var_adj[j]], dtype=np.int64)
+    cols = np.array([j for j in range(n) for _ in var_adj[j]], dtype=np.int64)
+    return TannerGraph(rows, cols, m, n)
+
+def _peg_farthest_checks(j, var_adj, chk_adj, m):
+    reached = np.zeros(m, dtype=bool)
+    reached[var_adj[j]] = True
+    frontier = list(var_adj[j])
+    seen_vars = {j}
+    while True:
+        new_checks = set()
+        for c in frontier:
+            for v in chk_adj[c]:
+                if v in seen_vars:
+                    continue
+                seen_vars.add(v)
+                new_checks.update(x for x in var_adj[v] if not reached[x])
+        if not new_checks:
+            unreached = np.nonzero(~reached)[0]
+            return unreached if unreached.size else np.setdiff1d(np.arange(m), var_adj[j])
+        new_checks = np.array(sorted(new_checks))
+        if reached.sum() + new_checks.size == m:
+            return new_checks
+        reached[new_checks] = True
+        frontier = new_checks
+
+def generate_qc_base(n_blocks=24, m_blocks=12, Z=64, wc=3, seed=None, max_tries=100):
+    # Base matrix of circulant shifts (-1 marks an all-zero block). Each block
+    # column gets wc shifted identities, and shifts are redrawn to avoid
+    # 4-cycles, i.e. s[a, x] - s[a, y] + s[b, y] - s[b, x] == 0 (mod Z).
+    rng = np.random.RandomState(seed)
+    base = -np.ones((m_blocks, n_blocks), dtype=np.int64)
+    row_deg = np.zeros(m_blocks, dtype=int)
+    for x in range(n_blocks):
+        weight = min(wc, m_blocks)
+        order = np.lexsort((rng.rand(m_blocks), row_deg))
+        block_rows = order[:weight]
+        for a in block_rows:
+            for _ in range(max_tries):
+                base[a, x] = rng.randint(Z)
+                if not _qc_has_4cycle(base, a, x, Z):
+                    break
+            else:
+                raise ValueError("No 4-cycle free shift found for block ({}, {}) "
+                                 "in {} tries; increase Z or max_tries".format(a, x, max_tries))
+            row_deg[a] += 1
+    return base
+
+def _qc_has_4cycle(base, a, x, Z):
+    for b in np.nonzero(base[:, x] >= 0)[0]:
+        if b == a:
+            continue
+        for y in np.nonzero((base[a] >= 0) & (base[b] >= 0))[0]:
+            if y == x:
+                continue
+            if (base[a, x] - base[a, y] + base[b, y] - base[b, x]) % Z == 0:
+                return True
+    return False
+
+def qc_to_tanner(base, Z):
+    block_rows, block_cols = np.nonzero(base >= 0)
+    shifts = base[block_rows, block_cols]
+    r = np.arange(Z)
+    rows = (block_rows[:, None] * Z + r[None, :]).ravel()
+    cols = (block_cols[:, None] * Z + (r[None, :] + shifts[:, None]) % Z).ravel()
+    m_blocks, n_blocks = base.shape
+    return TannerGraph(rows.astype(np.int64), cols.astype(np.int64), m_blocks * Z, n_blocks * Z)
+
+def tanner_girth(graph):
+    # Shortest cycle length via BFS from every variable node; 0 if acyclic.
+    n = graph.n
+    adj = [[] for _ in range(n + graph.m)]
+    for c, v in zip(graph.rows.tolist(), graph.cols.tolist()):
+        adj[v].append(n + c)
+        adj[n + c].append(v)
+    best = np.inf
+    for source in range(n):
+        dist = {source: 0}
+        parent = {source: -1}
+        queue = [source]
+        for node in queue:
+            if 2 * dist[node] + 1 >= best:
+                break
+            for nxt in adj[node]:
+                if nxt not in dist:
+                    dist[nxt] = dist[node] + 1
+                    parent[nxt] = node
+                    queue.append(nxt)
+                elif nxt != parent[node]:
+                    best = min(best, dist[node] + dist[nxt] + 1)
+    return 0 if best == np.inf else int(best)
+
+def _edge_sum(index, size, values):
+    # Row-wise sum of per-edge values into `size` buckets for a whole batch.
+    batch = values.shape[0]
+    flat = (np.arange(batch)[:, None] * size + index[None, :]).ravel()
+    sums = np.bincount(flat, weights=values.ravel(), minlength=batch * size)
+    return sums.reshape(batch, size).astype(np.int64)
+
+def syndrome_edges(graph, codewords):
+    codewords = np.atleast_2d(codewords)
+    counts = _edge_sum(graph.rows, graph.m, codewords[:, graph.cols])
+    return (counts & 1).astype(np.uint8)
+
+def gallager_b_edges(graph, received_word, th0=0.5, th1=0.5, max_iter=100):
+    # Same update rule as gallager_b_algorithm, evaluated over the edge list.
+    received_word = np.asarray(received_word)
+    for iteration in range(max_iter):
+        syndrome = syndrome_edges(graph, received_word)[0]
+        if np.count_nonzero(syndrome) == 0:
+            return received_word
+
+        LLR = np.bincount(graph.cols, weights=1 - 2 * syndrome[graph.rows].astype(int),
+                          minlength=graph.n)
+
+        received_word = np.where(LLR >= th1, 0, 1)
+        received_word = np.where(LLR <= -th0, 1, received_word)
+
+    return received_word
+
+def bit_flip_decode_batch(graph, words, max_iter=50):
+    # Hard-decision bit flipping on a batch of received words: each round,
+    # flip the bits with the most unsatisfied checks. Returns the decoded words
+    # and a mask of words whose syndrome reached zero.
+    words = np.atleast_2d(words).astype(np.uint8).copy()
+    active = np.arange(words.shape[0])
+    for iteration in range(max_iter):
+        syndrome = syndrome_edges(graph, words[active])
+        unsolved = syndrome.any(axis=1)
+        active, syndrome = active[unsolved], syndrome[unsolved]
+        if active.size == 0:
+            break
+        unsatisfied = _edge_sum(graph.cols, graph.n, syndrome[:, graph.rows])
+        worst = unsatisfied.max(axis=1, keepdims=True)
+        words[active] ^= (unsatisfied == worst).astype(np.uint8)
+    success = ~syndrome_edges(graph, words).any(axis=1)
+    return words, success
+
 def generate_syndrome_table(H):
     n_minus_k, n = H.shape
     syndromes = {}
@@ -71,3 +357,22 @@ if __name__ == "__main__":
     print(uncorrectable_error)
     print(f"Weight of the uncorrectable error vector: {np.sum(uncorrectable_error)}")
     print(f"Comparison with code distance: {d_min}")
+
+    Gp, info = generator_matrix(H)
+    messages = np.random.randint(2, size=(4, Gp.shape[0]))
+    codewords = encode_batch(Gp, messages, H.shape[1])
+    print("Encoded codewords:")
+    print(codewords)
+    print("Syndromes of encoded codewords:")
+    print(syndrome_batch(pack_bits(H), codewords))
+
+    peg = generate_peg_graph(seed=index_number)
+    print(f"PEG H matrix (girth {tanner_girth(peg)}, random H girth {tanner_girth(tanner_from_H(H))}):")
+    print(tanner_to_H(peg))
+
+    base = generate_qc_base(seed=index_number)
+    qc = qc_to_tanner(base, 64)
+    Gp, info = generator_matrix(qc)
+    codewords = encode_batch(Gp, np.random.randint(2, size=(4, Gp.shape[0])), qc.n)
+    print(f"QC code: n={qc.n}, k={Gp.shape[0]}, edges={qc.rows.size}, girth {tanner_girth(qc)}")
+    print("QC syndromes all zero:", not syndrome_edges(qc, codewords).any())